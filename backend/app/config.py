@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,6 +13,26 @@ class MatcherThresholds(BaseModel):
     brand_token_match_fraction: float = 0.5
 
 
+class ConcurrencySettings(BaseModel):
+    initial_limit: int = 8
+    min_limit: int = 1
+    max_limit: int = 64
+    backoff_ratio: float = 0.9  # multiplicative decrease on overload
+    latency_tolerance: float = 2.0  # latency above min * tolerance counts as congestion
+    window: int = 100  # samples used to track the minimum latency
+    max_queue: int = 16
+    queue_timeout_s: float = 2.0
+
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = 0.0  # fraction of /api/verify requests profiled automatically
+    header: str = "X-ALV-Profile"
+    header_token: str = ""  # header value that enables profiling; empty disables the header
+    report_dir: Optional[str] = None  # write JSON reports here, newest max_reports kept
+    max_reports: int = 50
+    top_n: int = 15
+
+
 class Settings(BaseSettings):
     """Runtime configuration for the verifier service."""
 
@@ -27,7 +47,21 @@ class Settings(BaseSettings):
     ocr_languages: List[str] = ["en"]
     use_gpu: bool = False
     gemini_api_key: str = ""
+    gemini_model: str = "gemini-2.5-flash"
+    # Per-request output-token budget. On thinking models (gemini-2.5-flash) it also
+    # covers thinking tokens; a small budget can be spent entirely on thinking,
+    # leaving no response text and failing the request with a 502.
+    max_output_tokens: Optional[int] = None
+    batch_backend: Literal["gemini", "local"] = "gemini"
+    batch_api_key: str = ""  # falls back to gemini_api_key; use a separate project for its own quota
+    batch_local_dir: str = ".batch_jobs"
+    batch_max_inline_bytes: int = 20_000_000  # provider cap on inline batch request bodies
+    # Raw upload cap checked before any decoding. Resizing to 1024px usually shrinks
+    # photos well below their upload size, so this is looser than the inline cap.
+    batch_max_upload_bytes: int = 100_000_000
     matcher_thresholds: MatcherThresholds = MatcherThresholds()
+    concurrency: ConcurrencySettings = ConcurrencySettings()
+    profiling: ProfilingSettings = ProfilingSettings()
     gov_warning_phrase: str = "GOVERNMENT WARNING"
     gov_warning_snippet: str = (
         "ACCORDING TO THE SURGEON GENERAL"
@@ -1,7 +1,7 @@
 import json
-from typing import Annotated
+from typing import Annotated, List
 
-from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile, Request
+from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -9,7 +9,23 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
 from .config import Settings, get_settings
-from .schemas import VerificationPayload, VerificationResponse
+from .schemas import (
+    BatchJobStatus,
+    ConcurrencyStatus,
+    UsageSummary,
+    VerificationPayload,
+    VerificationResponse,
+)
+from .services.batch import BatchVerifierService, get_batch_service
+from .services.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from .services.profiling import (
+    PROFILE_STATUS_HEADER,
+    finish_profiler,
+    header_requests_profile,
+    should_profile,
+    start_profiler,
+)
+from .services.usage import UsageTracker, get_usage_tracker
 from .services.verifier_service import VerifierService, get_verifier_service
 
 
@@ -35,10 +51,21 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     async def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/api/usage", response_model=UsageSummary)
+    async def usage(tracker: UsageTracker = Depends(get_usage_tracker)) -> UsageSummary:
+        return tracker.snapshot()
+
+    @app.get("/api/concurrency", response_model=ConcurrencyStatus)
+    async def concurrency(
+        limiter: AdaptiveConcurrencyLimiter = Depends(get_concurrency_limiter),
+    ) -> ConcurrencyStatus:
+        return limiter.status()
+
     @app.post("/api/verify", response_model=VerificationResponse)
     @limiter.limit("10/minute")
     async def verify(
         request: Request,
+        response: Response,
         form_payload: Annotated[str, Form(...)],
         image: Annotated[UploadFile, File(...)],
         service: VerifierService = Depends(get_verifier_service),
@@ -48,7 +75,55 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         except json.JSONDecodeError as exc:  # pragma: no cover - validated via FastAPI
             raise HTTPException(status_code=400, detail="Invalid JSON payload") from exc
         payload = VerificationPayload(**payload_dict)
-        return await service.verify(payload, image)
+
+        header_value = request.headers.get(cfg.profiling.header)
+        if not should_profile(cfg.profiling, header_value):
+            return await service.verify(payload, image)
+        profiler = start_profiler(cfg.profiling)
+        if profiler is None:
+            # Another request holds the process-wide profiler; say so instead of a silent debug: null.
+            print("Profiling skipped: another request is being profiled")
+            response.headers[PROFILE_STATUS_HEADER] = "skipped-busy"
+            return await service.verify(payload, image)
+        try:
+            result = await service.verify(payload, image, profiler=profiler)
+        finally:
+            report = await finish_profiler(profiler, cfg.profiling)
+        response.headers[PROFILE_STATUS_HEADER] = "profiled"
+        if header_requests_profile(cfg.profiling, header_value):
+            result.debug = report
+        return result
+
+    @app.post("/api/batch/verify", response_model=BatchJobStatus)
+    @limiter.limit("10/minute")
+    async def submit_batch(
+        request: Request,
+        form_payloads: Annotated[str, Form(...)],
+        images: Annotated[List[UploadFile], File(...)],
+        service: BatchVerifierService = Depends(get_batch_service),
+    ) -> BatchJobStatus:
+        try:
+            payload_dicts = json.loads(form_payloads)
+        except json.JSONDecodeError as exc:  # pragma: no cover - validated via FastAPI
+            raise HTTPException(status_code=400, detail="Invalid JSON payload") from exc
+        if not isinstance(payload_dicts, list) or len(payload_dicts) != len(images):
+            raise HTTPException(
+                status_code=400, detail="form_payloads must be a JSON list with one entry per image"
+            )
+        # Sizes come from the parsed multipart form, so this runs before any image is read.
+        service.check_upload_size(sum(image.size or 0 for image in images))
+        items = [
+            (VerificationPayload(**payload_dict), await image.read())
+            for payload_dict, image in zip(payload_dicts, images)
+        ]
+        return await service.submit(items)
+
+    @app.get("/api/batch/{job_id}", response_model=BatchJobStatus)
+    async def batch_status(
+        job_id: str,
+        service: BatchVerifierService = Depends(get_batch_service),
+    ) -> BatchJobStatus:
+        return await service.status(job_id)
 
     return app
 
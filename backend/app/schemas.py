@@ -36,9 +36,101 @@ class FieldCheck(BaseModel):
     confidence: Optional[float] = None
 
 
+class TokenUsage(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = Field(default=0, description="Billed output, including thinking tokens")
+    thinking_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+
+
+class UsageSummary(TokenUsage):
+    requests: int = 0
+
+
+class ConcurrencyStatus(BaseModel):
+    limit: int
+    in_flight: int
+    queue_depth: int
+    min_latency_ms: Optional[float] = None
+
+
+class StageProfile(BaseModel):
+    name: str
+    duration_ms: float
+    peak_memory_kb: float
+
+
+class FunctionProfile(BaseModel):
+    function: str
+    calls: int
+    total_ms: float
+    cumulative_ms: float
+
+
+class AllocationSite(BaseModel):
+    location: str
+    size_kb: float
+    count: int
+
+
+class ProfileReport(BaseModel):
+    scope: str = Field(
+        default="process",
+        description=(
+            "Stage timings belong to this request. CPU and memory figures are process-wide: "
+            "they include other requests running concurrently on the event loop."
+        ),
+    )
+    total_ms: float
+    peak_memory_kb: float = Field(..., description="Process-wide tracemalloc peak")
+    stages: List[StageProfile] = Field(
+        ...,
+        description=(
+            "upload covers reading the already parsed file; multipart request-body parsing "
+            "happens before profiling starts and is not included"
+        ),
+    )
+    top_functions: List[FunctionProfile] = Field(
+        ...,
+        description=(
+            "cProfile of the event-loop thread, including concurrent requests' coroutines; "
+            "threadpool work such as the Gemini SDK call is not profiled"
+        ),
+    )
+    top_allocations: List[AllocationSite] = Field(
+        ..., description="Process-wide allocation growth over the request"
+    )
+
+
 class VerificationResponse(BaseModel):
     status: str
     duration_ms: float
     checks: List[FieldCheck]
     ocr_tokens: List[str]
     raw_ocr_text: str
+    prompt_version: Optional[str] = None
+    usage: Optional[TokenUsage] = None
+    debug: Optional[ProfileReport] = None
+
+
+class BatchState(str, Enum):
+    pending = "PENDING"
+    running = "RUNNING"
+    succeeded = "SUCCEEDED"
+    failed = "FAILED"
+    cancelled = "CANCELLED"
+    expired = "EXPIRED"
+
+
+class BatchItemResult(BaseModel):
+    key: str
+    response: Optional[VerificationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchJobStatus(BaseModel):
+    job_id: str
+    state: BatchState
+    item_count: Optional[int] = None
+    results: List[BatchItemResult] = []
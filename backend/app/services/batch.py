@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import base64
+import io
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from ..config import Settings, get_settings
+from ..schemas import (
+    BatchItemResult,
+    BatchJobStatus,
+    BatchState,
+    TokenUsage,
+    VerificationPayload,
+)
+from .prompts import VERIFICATION_PROMPT
+from .usage import UsageTracker, get_usage_tracker
+from .verifier_service import build_verification_response, load_label_image, parse_response_text
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+_GEMINI_STATES = {
+    "BATCH_STATE_PENDING": BatchState.pending,
+    "BATCH_STATE_RUNNING": BatchState.running,
+    "BATCH_STATE_SUCCEEDED": BatchState.succeeded,
+    "BATCH_STATE_FAILED": BatchState.failed,
+    "BATCH_STATE_CANCELLED": BatchState.cancelled,
+    "BATCH_STATE_EXPIRED": BatchState.expired,
+}
+
+
+@dataclass
+class BatchPoll:
+    """Provider-agnostic view of a batch job.
+
+    ``responses`` holds inlined responses in the Gemini batch shape
+    (``{"metadata": {"key": ...}, "response": {...}}`` or ``{"error": ...}``)
+    once the job has finished.
+    """
+
+    state: BatchState
+    item_count: Optional[int] = None
+    responses: List[dict] = field(default_factory=list)
+
+
+class BatchBackend(ABC):
+    """Submits packaged ``generateContent`` requests and reports on the job."""
+
+    @abstractmethod
+    def submit(self, requests: List[dict], display_name: str) -> str:
+        """Create a job from keyed requests and return its id."""
+
+    @abstractmethod
+    def poll(self, job_id: str) -> BatchPoll:
+        """Return the current state, with responses once the job is done."""
+
+
+class GeminiBatchBackend(BatchBackend):
+    """Gemini Batch API via REST; batch jobs draw on their own quota pool."""
+
+    def __init__(self, api_key: str, model: str, client: httpx.Client | None = None) -> None:
+        self.api_key = api_key
+        self.model = model
+        self.client = client or httpx.Client(base_url=GEMINI_API_BASE, timeout=60.0)
+        # Header rather than ?key= so the key never shows up in URLs, logs or error messages.
+        self.client.headers["x-goog-api-key"] = api_key
+
+    def submit(self, requests: List[dict], display_name: str) -> str:
+        body = {
+            "batch": {
+                "display_name": display_name,
+                "input_config": {"requests": {"requests": requests}},
+            }
+        }
+        resp = self.client.post(f"/models/{self.model}:batchGenerateContent", json=body)
+        resp.raise_for_status()
+        name = resp.json()["name"]
+        return name.removeprefix("batches/")
+
+    def poll(self, job_id: str) -> BatchPoll:
+        resp = self.client.get(f"/batches/{job_id}")
+        resp.raise_for_status()
+        operation = resp.json()
+        metadata = operation.get("metadata", {})
+        state = _GEMINI_STATES.get(metadata.get("state", ""), BatchState.pending)
+        stats = metadata.get("batchStats", {})
+        item_count = int(stats["requestCount"]) if "requestCount" in stats else None
+        output = operation.get("response") or metadata.get("output") or {}
+        responses = output.get("inlinedResponses", {}).get("inlinedResponses", [])
+        return BatchPoll(state=state, item_count=item_count, responses=responses)
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for the provider batch API.
+
+    Each job is a directory holding ``requests.jsonl``. The job is finished
+    once ``responses.jsonl`` exists, either written by an external worker or
+    produced on the next poll by ``responder``, which maps one
+    ``generateContent`` request body to a response body.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        responder: Callable[[dict], dict] | None = None,
+    ) -> None:
+        self.root = Path(root)
+        self.responder = responder
+
+    def submit(self, requests: List[dict], display_name: str) -> str:
+        job_id = uuid.uuid4().hex
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True)
+        with (job_dir / "requests.jsonl").open("w", encoding="utf-8") as fh:
+            for item in requests:
+                fh.write(json.dumps(item) + "\n")
+        return job_id
+
+    def poll(self, job_id: str) -> BatchPoll:
+        job_dir = self.root / job_id
+        requests_path = job_dir / "requests.jsonl"
+        if not job_id.isalnum() or not requests_path.exists():
+            raise KeyError(job_id)
+        requests = _read_jsonl(requests_path)
+        responses_path = job_dir / "responses.jsonl"
+        if not responses_path.exists():
+            if self.responder is None:
+                return BatchPoll(state=BatchState.pending, item_count=len(requests))
+            self._run(requests, responses_path)
+        return BatchPoll(
+            state=BatchState.succeeded,
+            item_count=len(requests),
+            responses=_read_jsonl(responses_path),
+        )
+
+    def _run(self, requests: List[dict], responses_path: Path) -> None:
+        tmp_path = responses_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            for item in requests:
+                try:
+                    line = {"metadata": item.get("metadata", {}), "response": self.responder(item["request"])}
+                except Exception as e:
+                    line = {"metadata": item.get("metadata", {}), "error": {"message": str(e)}}
+                fh.write(json.dumps(line) + "\n")
+        tmp_path.replace(responses_path)
+
+
+class BatchVerifierService:
+    """Packages label verifications into provider batch jobs and fans results back."""
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        backend: BatchBackend | None = None,
+        usage_tracker: UsageTracker | None = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self.backend = backend or get_batch_backend(self.settings)
+        self.usage_tracker = usage_tracker or get_usage_tracker()
+
+    async def submit(self, items: List[Tuple[VerificationPayload, bytes]]) -> BatchJobStatus:
+        if not items:
+            raise HTTPException(status_code=400, detail="Batch must contain at least one label")
+        self.check_upload_size(sum(len(image_bytes) for _, image_bytes in items))
+        # PIL decode, JPEG re-encode and base64 are CPU-bound; keep them off the event loop.
+        requests, body_bytes = await run_in_threadpool(self._build_requests, items)
+        limit = self.settings.batch_max_inline_bytes
+        if body_bytes > limit:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Batch payload is {body_bytes / 1_000_000:.1f} MB; inline batches are limited to "
+                    f"{limit / 1_000_000:.1f} MB. Split it into smaller batches."
+                ),
+            )
+        try:
+            job_id = await run_in_threadpool(
+                self.backend.submit, requests, f"alv-{uuid.uuid4().hex[:8]}"
+            )
+        except Exception as e:
+            print(f"Batch submit error: {_describe_upstream_error(e)}")
+            raise HTTPException(status_code=502, detail="Batch submission failed")
+        return BatchJobStatus(job_id=job_id, state=BatchState.pending, item_count=len(requests))
+
+    def check_upload_size(self, upload_bytes: int) -> None:
+        """Reject batches whose raw uploads are clearly too large before encoding them."""
+        limit = self.settings.batch_max_upload_bytes
+        if upload_bytes > limit:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Batch uploads total {upload_bytes / 1_000_000:.1f} MB; the limit is "
+                    f"{limit / 1_000_000:.1f} MB. Split it into smaller batches."
+                ),
+            )
+
+    async def status(self, job_id: str) -> BatchJobStatus:
+        try:
+            poll = await run_in_threadpool(self.backend.poll, job_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+        except Exception as e:
+            print(f"Batch poll error: {_describe_upstream_error(e)}")
+            raise HTTPException(status_code=502, detail="Batch status lookup failed")
+        results = [self._to_result(i, item) for i, item in enumerate(poll.responses)]
+        if poll.state == BatchState.succeeded:
+            # Jobs are polled repeatedly; count a finished job's usage once.
+            self.usage_tracker.record_many(
+                [_usage_from_json(item["response"]) for item in poll.responses if "response" in item],
+                key=f"batch:{job_id}",
+            )
+        return BatchJobStatus(
+            job_id=job_id,
+            state=poll.state,
+            item_count=poll.item_count,
+            results=results,
+        )
+
+    def _build_requests(self, items: List[Tuple[VerificationPayload, bytes]]) -> Tuple[List[dict], int]:
+        requests = [
+            {"request": self._build_request(payload, image_bytes), "metadata": {"key": f"item-{i}"}}
+            for i, (payload, image_bytes) in enumerate(items)
+        ]
+        body_bytes = sum(len(json.dumps(item)) for item in requests)
+        return requests, body_bytes
+
+    def _build_request(self, payload: VerificationPayload, image_bytes: bytes) -> dict:
+        img = load_label_image(image_bytes)
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, format="JPEG", quality=90)
+        generation_config: dict = {"temperature": 0.0}
+        if self.settings.max_output_tokens:
+            generation_config["max_output_tokens"] = self.settings.max_output_tokens
+        return {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [
+                        {"text": VERIFICATION_PROMPT.render(payload)},
+                        {
+                            "inline_data": {
+                                "mime_type": "image/jpeg",
+                                "data": base64.b64encode(buf.getvalue()).decode("ascii"),
+                            }
+                        },
+                    ],
+                }
+            ],
+            "generation_config": generation_config,
+        }
+
+    def _to_result(self, index: int, item: dict) -> BatchItemResult:
+        key = item.get("metadata", {}).get("key", f"item-{index}")
+        if "error" in item:
+            return BatchItemResult(key=key, error=item["error"].get("message", str(item["error"])))
+        response = item.get("response", {})
+        try:
+            parts = response["candidates"][0]["content"]["parts"]
+            text = "".join(part.get("text", "") for part in parts)
+            result_json = parse_response_text(text)
+            verification = build_verification_response(result_json, 0.0, _usage_from_json(response))
+        except Exception as e:
+            return BatchItemResult(key=key, error=f"Unparseable batch response: {e}")
+        return BatchItemResult(key=key, response=verification)
+
+
+def _usage_from_json(response: dict) -> TokenUsage:
+    metadata = response.get("usageMetadata") or response.get("usage_metadata") or {}
+    input_tokens = metadata.get("promptTokenCount", 0)
+    thinking_tokens = metadata.get("thoughtsTokenCount", 0)
+    output_tokens = metadata.get("candidatesTokenCount", 0) + thinking_tokens
+    return TokenUsage(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        thinking_tokens=thinking_tokens,
+        cached_tokens=metadata.get("cachedContentTokenCount", 0),
+        total_tokens=metadata.get("totalTokenCount", input_tokens + output_tokens),
+    )
+
+
+def _describe_upstream_error(exc: Exception) -> str:
+    """Summarize an upstream failure without echoing request URLs or bodies."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HTTP {exc.response.status_code}"
+    return type(exc).__name__
+
+
+def _read_jsonl(path: Path) -> List[dict]:
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def get_batch_backend(settings: Settings | None = None) -> BatchBackend:
+    cfg = settings or get_settings()
+    if cfg.batch_backend == "local":
+        return LocalBatchBackend(cfg.batch_local_dir)
+    api_key = (
+        cfg.batch_api_key
+        or cfg.gemini_api_key
+        or os.getenv("ALV_GEMINI_API_KEY")
+        or os.getenv("GEMINI_API_KEY")
+    )
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Server misconfiguration: Missing Gemini API Key")
+    return GeminiBatchBackend(api_key, cfg.gemini_model)
+
+
+@lru_cache
+def get_default_batch_backend() -> BatchBackend:
+    return get_batch_backend(get_settings())
+
+
+def get_batch_service() -> BatchVerifierService:
+    return BatchVerifierService(backend=get_default_batch_backend())
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from functools import lru_cache
+from typing import AsyncIterator, Callable, ContextManager, Deque, Optional
+
+from ..config import ConcurrencySettings, get_settings
+from ..schemas import ConcurrencyStatus
+
+
+class LimitExceeded(Exception):
+    """Raised when no upstream slot frees up within the queue budget."""
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Treat 429s, 5xx and timeouts from the upstream client as congestion."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit around upstream calls.
+
+    Modeled on Netflix's concurrency-limits: the limit grows by one while
+    latency stays within ``latency_tolerance`` times the minimum observed over
+    the last ``window`` samples and the limit is actually being used. It is
+    multiplied by ``backoff_ratio`` when latency climbs past that band or when
+    the call fails with an overload error. Callers beyond the limit wait in a
+    bounded queue for at most ``queue_timeout_s`` before ``LimitExceeded``.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: float = 2.0,
+        window: int = 100,
+        max_queue: int = 16,
+        queue_timeout_s: float = 2.0,
+        is_drop: Callable[[BaseException], bool] = is_overload_error,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.is_drop = is_drop
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    @classmethod
+    def from_settings(cls, cfg: ConcurrencySettings) -> "AdaptiveConcurrencyLimiter":
+        return cls(**cfg.model_dump())
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    @property
+    def min_latency_ms(self) -> Optional[float]:
+        return min(self._latencies) * 1000 if self._latencies else None
+
+    def status(self) -> ConcurrencyStatus:
+        min_latency = self.min_latency_ms
+        return ConcurrencyStatus(
+            limit=self.limit,
+            in_flight=self.in_flight,
+            queue_depth=self.queue_depth,
+            min_latency_ms=round(min_latency, 2) if min_latency is not None else None,
+        )
+
+    async def acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            raise LimitExceeded("Upstream concurrency limit reached")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            # The releasing caller hands its slot over by resolving the future.
+            async with asyncio.timeout(self.queue_timeout_s):
+                await fut
+        except BaseException as exc:
+            handed_over = fut.done() and not fut.cancelled()
+            if isinstance(exc, TimeoutError):
+                if handed_over:
+                    # Timed out at the same moment the slot arrived; keep it.
+                    return
+                raise LimitExceeded("Timed out waiting for an upstream slot")
+            if handed_over:
+                # Cancelled after _wake() counted us in flight; give the slot back.
+                self.release()
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def record(self, latency_s: float, dropped: bool, in_flight: int) -> None:
+        if dropped:
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            return
+        self._latencies.append(latency_s)
+        if latency_s > min(self._latencies) * self.latency_tolerance:
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        elif in_flight * 2 >= self.limit:
+            self._limit = min(self.max_limit, self._limit + 1)
+
+    @asynccontextmanager
+    async def slot(self, wait_context: ContextManager[None] | None = None) -> AsyncIterator[None]:
+        """Acquire a slot, run the body on it, then release it.
+
+        ``wait_context`` wraps only the wait for the slot (e.g. a profiling
+        stage); the slot is released even if it raises on exit.
+        """
+        acquired = False
+        try:
+            with wait_context if wait_context is not None else nullcontext():
+                await self.acquire()
+                acquired = True
+        except BaseException:
+            if acquired:
+                self.release()
+            raise
+        async with self.held():
+            yield
+
+    @asynccontextmanager
+    async def held(self) -> AsyncIterator[None]:
+        """Time a call on an already acquired slot, then release it."""
+        in_flight = self._in_flight
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            if self.is_drop(exc):
+                self.record(time.perf_counter() - start, dropped=True, in_flight=in_flight)
+            raise
+        else:
+            self.record(time.perf_counter() - start, dropped=False, in_flight=in_flight)
+        finally:
+            self.release()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self._in_flight += 1
+            fut.set_result(None)
+
+
+@lru_cache
+def get_concurrency_limiter() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter.from_settings(get_settings().concurrency)
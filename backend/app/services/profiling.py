@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import cProfile
+import hmac
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Iterator, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import ProfilingSettings
+from ..schemas import AllocationSite, FunctionProfile, ProfileReport, StageProfile
+
+# cProfile and tracemalloc are process-global, so only one request is profiled at a time.
+_profile_lock = threading.Lock()
+
+
+class RequestProfiler:
+    """Per-stage timing for one request plus process-wide CPU and memory.
+
+    cProfile only sees the event-loop thread, so it also records whatever
+    other requests run there during awaits and misses threadpool work.
+    tracemalloc peaks and allocation diffs cover the whole process.
+    """
+
+    def __init__(self, top_n: int = 15) -> None:
+        self.top_n = top_n
+        self.stages: List[StageProfile] = []
+        self._profile = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self._start = 0.0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot()
+        self._start = time.perf_counter()
+        self._profile.enable()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.stages.append(
+                StageProfile(
+                    name=name,
+                    duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                    peak_memory_kb=round(peak / 1024, 1),
+                )
+            )
+
+    def finish(self) -> ProfileReport:
+        self._profile.disable()
+        total_ms = (time.perf_counter() - self._start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        return ProfileReport(
+            total_ms=round(total_ms, 2),
+            peak_memory_kb=round(max([peak / 1024] + [s.peak_memory_kb for s in self.stages]), 1),
+            stages=self.stages,
+            top_functions=self._top_functions(),
+            top_allocations=self._top_allocations(snapshot),
+        )
+
+    def _top_functions(self) -> List[FunctionProfile]:
+        stats = pstats.Stats(self._profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            FunctionProfile(
+                function=f"{filename}:{lineno}({func})",
+                calls=total_calls,
+                total_ms=round(total_time * 1000, 2),
+                cumulative_ms=round(cumulative_time * 1000, 2),
+            )
+            for (filename, lineno, func), (_, total_calls, total_time, cumulative_time, _) in rows[: self.top_n]
+        ]
+
+    def _top_allocations(self, snapshot: tracemalloc.Snapshot) -> List[AllocationSite]:
+        if self._baseline is None:
+            return []
+        diffs = snapshot.compare_to(self._baseline, "lineno")
+        return [
+            AllocationSite(
+                location=f"{diff.traceback[0].filename}:{diff.traceback[0].lineno}",
+                size_kb=round(diff.size_diff / 1024, 1),
+                count=diff.count_diff,
+            )
+            for diff in diffs[: self.top_n]
+        ]
+
+
+def profile_stage(profiler: RequestProfiler | None, name: str) -> ContextManager[None]:
+    """Stage hook that costs a single ``None`` check when profiling is off."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+PROFILE_STATUS_HEADER = "X-ALV-Profile-Status"
+
+
+def header_requests_profile(cfg: ProfilingSettings, header_value: str | None) -> bool:
+    """Constant-time check of the profiling header against the configured token."""
+    if not cfg.header_token or header_value is None:
+        return False
+    return hmac.compare_digest(header_value.encode(), cfg.header_token.encode())
+
+
+def should_profile(cfg: ProfilingSettings, header_value: str | None) -> bool:
+    if header_requests_profile(cfg, header_value):
+        return True
+    # Sampled reports are only ever written to disk, so skip sampling without a report_dir.
+    return bool(cfg.report_dir) and cfg.sample_rate > 0 and random.random() < cfg.sample_rate
+
+
+def start_profiler(cfg: ProfilingSettings) -> RequestProfiler | None:
+    """Start a profiler, or return ``None`` if another request holds it."""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = RequestProfiler(top_n=cfg.top_n)
+    try:
+        profiler.start()
+    except Exception:
+        _profile_lock.release()
+        raise
+    return profiler
+
+
+async def finish_profiler(profiler: RequestProfiler, cfg: ProfilingSettings) -> ProfileReport:
+    try:
+        report = profiler.finish()
+    finally:
+        _profile_lock.release()
+    if cfg.report_dir:
+        await run_in_threadpool(write_report, report, Path(cfg.report_dir), cfg.max_reports)
+    return report
+
+
+def write_report(report: ProfileReport, directory: Path, max_reports: int) -> Path:
+    """Write ``report`` as JSON and keep only the newest ``max_reports`` files."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"profile-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}.json"
+    path.write_text(report.model_dump_json(indent=2), encoding="utf-8")
+    reports = sorted(directory.glob("profile-*.json"), key=lambda p: p.stat().st_mtime_ns)
+    for old in reports[: max(len(reports) - max_reports, 0)]:
+        old.unlink(missing_ok=True)
+    return path
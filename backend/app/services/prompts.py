@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from ..schemas import VerificationPayload
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Versioned prompt compiled once at import.
+
+    The instructions and JSON skeleton live in two prebuilt prefixes, with and
+    without the government warning check. Only the form-data suffix is
+    formatted per call.
+    """
+
+    version: str
+    prefix: str
+    gov_warning_prefix: str
+    suffix: str
+
+    def prefix_for(self, payload: VerificationPayload) -> str:
+        return self.gov_warning_prefix if payload.require_gov_warning else self.prefix
+
+    def render(self, payload: VerificationPayload) -> str:
+        return self.prefix_for(payload) + self.suffix.format(
+            brand_name=payload.brand_name,
+            product_class=payload.product_class,
+            alcohol_content=payload.alcohol_content,
+            net_contents=payload.net_contents or "Not Specified",
+            require_gov_warning="Yes" if payload.require_gov_warning else "No",
+        )
+
+
+_VERIFICATION_PREFIX = """
+        You are an expert Alcohol and Tobacco Tax and Trade Bureau (TTB) label specialist.
+        Your task is to verify if the provided alcohol label image matches the data submitted in the form.
+        The form data is given at the end of these instructions.
+
+        Instructions:
+        1. Extract all text from the label (OCR).
+        2. Compare the Form Data against the label text.
+           - Brand Name: Look for the brand name. It might be stylized. Fuzzy match is okay (e.g. "Trey Herring's" matches "Trey Herring").
+           - Product Class: Look for the class/type (e.g., "Bourbon Whiskey", "Vodka").
+           - ABV: Look for the alcohol percentage. BE STRICT. "40%" does NOT match "45%". "80 PROOF" matches "40% ALC/VOL".
+           - Net Contents: Look for volume (e.g., "750mL", "1 L"). If 'Not Specified' in form, return MATCH unless you clearly see a volume that contradicts standard sizes.
+           - Government Warning: If required, check if the standard "GOVERNMENT WARNING" text is present.
+
+        3. Output a JSON object with the following structure (do not include markdown formatting like ```json):
+        {
+            "checks": [
+                {
+                    "field": "brand_name",
+                    "status": "MATCH" | "MISMATCH" | "MISSING",
+                    "message": "Brief explanation",
+                    "evidence": "The text found on the label that supports this"
+                },
+                {
+                    "field": "product_class",
+                    "status": "MATCH" | "MISMATCH" | "MISSING",
+                    "message": "...",
+                    "evidence": "..."
+                },
+                {
+                    "field": "alcohol_content",
+                    "status": "MATCH" | "MISMATCH" | "MISSING",
+                    "message": "...",
+                    "evidence": "..."
+                },
+                {
+                    "field": "net_contents",
+                    "status": "MATCH" | "MISMATCH" | "MISSING",
+                    "message": "...",
+                    "evidence": "..."
+                },<GOV_WARNING_CHECK>
+            ],
+            "raw_ocr_text": "The full text extracted from the label...",
+            "ocr_tokens": ["list", "of", "all", "words", "found"]
+        }
+"""
+
+_GOV_WARNING_CHECK = """
+                {
+                    "field": "government_warning",
+                    "status": "MATCH" | "MISMATCH" | "MISSING",
+                    "message": "Check for 'GOVERNMENT WARNING' text",
+                    "evidence": "Text found..."
+                },"""
+
+_VERIFICATION_SUFFIX = """
+        Form Data:
+        - Brand Name: "{brand_name}"
+        - Product Class/Type: "{product_class}"
+        - Alcohol Content (ABV): "{alcohol_content}"
+        - Net Contents: "{net_contents}"
+        - Require Government Warning: {require_gov_warning}
+"""
+
+VERIFICATION_PROMPT = PromptTemplate(
+    version="verify-v3",
+    prefix=_VERIFICATION_PREFIX.replace("<GOV_WARNING_CHECK>", ""),
+    gov_warning_prefix=_VERIFICATION_PREFIX.replace("<GOV_WARNING_CHECK>", _GOV_WARNING_CHECK),
+    suffix=_VERIFICATION_SUFFIX,
+)
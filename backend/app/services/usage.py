@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable
+
+from ..schemas import TokenUsage, UsageSummary
+
+
+def usage_from_response(response: Any) -> TokenUsage:
+    """Read Gemini ``usage_metadata`` into a ``TokenUsage`` (zeros if absent)."""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return TokenUsage()
+    input_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    candidate_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    cached_tokens = getattr(metadata, "cached_content_token_count", 0) or 0
+    total_tokens = getattr(metadata, "total_token_count", 0) or (input_tokens + candidate_tokens)
+    # The pinned SDK does not expose thoughts_token_count, but thinking models
+    # bill it as output and include it in the total.
+    thinking_tokens = max(total_tokens - input_tokens - candidate_tokens, 0)
+    return TokenUsage(
+        input_tokens=input_tokens,
+        output_tokens=candidate_tokens + thinking_tokens,
+        thinking_tokens=thinking_tokens,
+        cached_tokens=cached_tokens,
+        total_tokens=total_tokens,
+    )
+
+
+class UsageTracker:
+    """Process-wide running totals of token usage across verifications."""
+
+    def __init__(self, max_recorded_keys: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._summary = UsageSummary()
+        # Recently recorded keys, oldest first; bounded so long-lived instances do not grow.
+        self._recorded_keys: OrderedDict[str, None] = OrderedDict()
+        self._max_recorded_keys = max_recorded_keys
+
+    def record(self, usage: TokenUsage) -> None:
+        self.record_many([usage])
+
+    def record_many(self, usages: Iterable[TokenUsage], key: str | None = None) -> None:
+        """Add ``usages`` to the totals; a recently seen ``key`` is not counted again."""
+        with self._lock:
+            if key is not None:
+                if key in self._recorded_keys:
+                    return
+                self._recorded_keys[key] = None
+                if len(self._recorded_keys) > self._max_recorded_keys:
+                    self._recorded_keys.popitem(last=False)
+            for usage in usages:
+                self._summary = UsageSummary(
+                    requests=self._summary.requests + 1,
+                    input_tokens=self._summary.input_tokens + usage.input_tokens,
+                    output_tokens=self._summary.output_tokens + usage.output_tokens,
+                    thinking_tokens=self._summary.thinking_tokens + usage.thinking_tokens,
+                    cached_tokens=self._summary.cached_tokens + usage.cached_tokens,
+                    total_tokens=self._summary.total_tokens + usage.total_tokens,
+                )
+
+    def snapshot(self) -> UsageSummary:
+        with self._lock:
+            return self._summary.model_copy()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._summary = UsageSummary()
+            self._recorded_keys.clear()
+
+
+@lru_cache
+def get_usage_tracker() -> UsageTracker:
+    return UsageTracker()
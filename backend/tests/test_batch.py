@@ -0,0 +1,160 @@
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.config import Settings
+from app.schemas import BatchState, VerificationPayload
+from app.services.batch import (
+    GEMINI_API_BASE,
+    BatchVerifierService,
+    GeminiBatchBackend,
+    LocalBatchBackend,
+    get_batch_service,
+)
+from app.services.usage import UsageTracker
+
+
+def _fake_gemini(request: dict) -> dict:
+    prompt = request["contents"][0]["parts"][0]["text"]
+    status = "MATCH" if '"Old Crow"' in prompt else "MISMATCH"
+    body = {
+        "checks": [{"field": "brand_name", "status": status, "message": "stub"}],
+        "raw_ocr_text": "OLD CROW",
+        "ocr_tokens": ["OLD", "CROW"],
+    }
+    return {
+        "candidates": [{"content": {"parts": [{"text": json.dumps(body)}]}}],
+        "usageMetadata": {
+            "promptTokenCount": 900,
+            "candidatesTokenCount": 60,
+            "thoughtsTokenCount": 40,
+            "totalTokenCount": 1000,
+        },
+    }
+
+
+def _payload(brand: str) -> VerificationPayload:
+    return VerificationPayload(brand_name=brand, product_class="Bourbon", alcohol_content="40%")
+
+
+@pytest.mark.asyncio
+async def test_local_batch_round_trip(tmp_path, labels_dir):
+    image_bytes = (labels_dir / "old_crow.jpg").read_bytes()
+    tracker = UsageTracker()
+    service = BatchVerifierService(
+        backend=LocalBatchBackend(tmp_path, responder=_fake_gemini), usage_tracker=tracker
+    )
+
+    job = await service.submit([(_payload("Old Crow"), image_bytes), (_payload("Bushmills"), image_bytes)])
+    assert job.state == BatchState.pending
+    assert job.item_count == 2
+
+    status = await service.status(job.job_id)
+    assert status.state == BatchState.succeeded
+    assert [r.key for r in status.results] == ["item-0", "item-1"]
+    assert status.results[0].response.status == "PASS"
+    assert status.results[1].response.status == "FAIL"
+    assert status.results[0].response.usage.input_tokens == 900
+    assert status.results[0].response.usage.output_tokens == 100
+    assert status.results[0].response.usage.thinking_tokens == 40
+
+    await service.status(job.job_id)
+    summary = tracker.snapshot()
+    assert summary.requests == 2
+    assert summary.input_tokens == 1800
+
+
+@pytest.mark.asyncio
+async def test_local_batch_stays_pending_without_worker(tmp_path, labels_dir):
+    image_bytes = (labels_dir / "old_crow.jpg").read_bytes()
+    service = BatchVerifierService(backend=LocalBatchBackend(tmp_path))
+
+    job = await service.submit([(_payload("Old Crow"), image_bytes)])
+    status = await service.status(job.job_id)
+    assert status.state == BatchState.pending
+    assert status.results == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_batch_is_rejected(tmp_path, labels_dir):
+    image_bytes = (labels_dir / "old_crow.jpg").read_bytes()
+    service = BatchVerifierService(
+        settings=Settings(batch_max_inline_bytes=1000), backend=LocalBatchBackend(tmp_path)
+    )
+
+    with pytest.raises(HTTPException) as err:
+        await service.submit([(_payload("Old Crow"), image_bytes)])
+    assert err.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_uploads_are_rejected_before_encoding(tmp_path, labels_dir, monkeypatch):
+    image_bytes = (labels_dir / "old_crow.jpg").read_bytes()
+    service = BatchVerifierService(
+        settings=Settings(batch_max_upload_bytes=len(image_bytes)), backend=LocalBatchBackend(tmp_path)
+    )
+
+    def fail(*args):
+        raise AssertionError("encoded an oversized batch")
+
+    monkeypatch.setattr(service, "_build_requests", fail)
+    with pytest.raises(HTTPException) as err:
+        await service.submit([(_payload("Old Crow"), image_bytes), (_payload("Old Crow"), image_bytes)])
+    assert err.value.status_code == 400
+
+
+def test_batch_endpoints(tmp_path, labels_dir):
+    app = create_app()
+    app.state.limiter.enabled = False
+    backend = LocalBatchBackend(tmp_path, responder=_fake_gemini)
+    app.dependency_overrides[get_batch_service] = lambda: BatchVerifierService(backend=backend)
+    client = TestClient(app)
+
+    payloads = [_payload("Old Crow").model_dump(mode="json")]
+    with (labels_dir / "old_crow.jpg").open("rb") as fh:
+        response = client.post(
+            "/api/batch/verify",
+            data={"form_payloads": json.dumps(payloads)},
+            files=[("images", ("old_crow.jpg", fh, "image/jpeg"))],
+        )
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    response = client.get(f"/api/batch/{job_id}")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["state"] == "SUCCEEDED"
+    assert body["results"][0]["response"]["status"] == "PASS"
+
+    assert client.get("/api/batch/unknown").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_gemini_backend_keeps_api_key_out_of_errors(capsys, labels_dir):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(403, json={"error": {"message": "denied"}})
+
+    client = httpx.Client(base_url=GEMINI_API_BASE, transport=httpx.MockTransport(handler))
+    service = BatchVerifierService(backend=GeminiBatchBackend("SECRET_KEY_123", "gemini-2.5-flash", client))
+    image_bytes = (labels_dir / "old_crow.jpg").read_bytes()
+
+    with pytest.raises(HTTPException) as submit_err:
+        await service.submit([(_payload("Old Crow"), image_bytes)])
+    with pytest.raises(HTTPException) as poll_err:
+        await service.status("abc123")
+
+    assert all(req.headers["x-goog-api-key"] == "SECRET_KEY_123" for req in seen)
+    assert all("SECRET_KEY_123" not in str(req.url) for req in seen)
+    assert "SECRET_KEY_123" not in str(submit_err.value.detail)
+    assert "SECRET_KEY_123" not in str(poll_err.value.detail)
+    out = capsys.readouterr().out
+    assert "HTTP 403" in out
+    assert "SECRET_KEY_123" not in out
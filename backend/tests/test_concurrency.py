@@ -0,0 +1,101 @@
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+
+from app.services.concurrency import AdaptiveConcurrencyLimiter, LimitExceeded
+
+
+class UpstreamError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_limit_grows_while_latency_stays_near_minimum():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=6)
+    for _ in range(5):
+        limiter.record(0.5, dropped=False, in_flight=limiter.limit)
+    assert limiter.limit == 6
+
+
+def test_limit_backs_off_on_latency_spike_and_drops():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+    limiter.record(0.5, dropped=False, in_flight=1)
+    limiter.record(5.0, dropped=False, in_flight=1)
+    assert limiter.limit == 5
+    limiter.record(0.5, dropped=True, in_flight=1)
+    assert limiter.limit == 2
+    assert limiter.min_latency_ms == 500.0
+
+
+@pytest.mark.asyncio
+async def test_overload_errors_cut_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+    with pytest.raises(UpstreamError):
+        async with limiter.slot():
+            raise UpstreamError(429)
+    assert limiter.limit == 5
+    with pytest.raises(UpstreamError):
+        async with limiter.slot():
+            raise UpstreamError(400)
+    assert limiter.limit == 5
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_quickly_when_queue_is_full():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue=1, queue_timeout_s=0.05)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+    with pytest.raises(LimitExceeded):
+        await limiter.acquire()
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+    assert limiter.queue_depth == 0
+    with pytest.raises(LimitExceeded):
+        await limiter.acquire()
+
+
+def test_concurrency_endpoint(client):
+    response = client.get("/api/concurrency")
+    assert response.status_code == 200
+    assert set(response.json()) == {"limit", "in_flight", "queue_depth", "min_latency_ms"}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_returns_handed_over_slot():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, queue_timeout_s=5.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    # The slot is handed to the waiter, which is cancelled before it resumes.
+    limiter.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth == 0
+    await asyncio.wait_for(limiter.acquire(), timeout=0.1)
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_released_when_wait_context_fails_after_acquire():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+
+    @contextmanager
+    def failing_on_exit():
+        yield
+        raise RuntimeError("stage bookkeeping failed")
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot(wait_context=failing_on_exit()):
+            pass
+    assert limiter.in_flight == 0
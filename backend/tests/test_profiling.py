@@ -0,0 +1,102 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.config import ProfilingSettings, Settings
+from app.main import create_app
+from app.services import profiling
+from app.services.profiling import should_profile
+from app.services.verifier_service import VerifierService, get_verifier_service
+
+STUB_BODY = {
+    "checks": [{"field": "brand_name", "status": "MATCH", "message": "stub"}],
+    "raw_ocr_text": "OLD CROW",
+    "ocr_tokens": ["OLD", "CROW"],
+}
+
+
+def _client(settings: Settings) -> TestClient:
+    service = VerifierService(settings=settings)
+    service.model = SimpleNamespace(generate_content=lambda parts: SimpleNamespace(text=json.dumps(STUB_BODY)))
+    app = create_app(settings)
+    app.state.limiter.enabled = False
+    app.dependency_overrides[get_verifier_service] = lambda: service
+    return TestClient(app)
+
+
+def _post(client: TestClient, labels_dir, headers=None):
+    payload = {"brand_name": "Old Crow", "product_class": "Bourbon", "alcohol_content": "40%"}
+    with (labels_dir / "old_crow.jpg").open("rb") as fh:
+        return client.post(
+            "/api/verify",
+            data={"form_payload": json.dumps(payload)},
+            files={"image": ("old_crow.jpg", fh, "image/jpeg")},
+            headers=headers or {},
+        )
+
+
+def test_profile_report_returned_for_matching_header(tmp_path, labels_dir):
+    settings = Settings(
+        gemini_api_key="test",
+        profiling=ProfilingSettings(header_token="secret", report_dir=str(tmp_path), max_reports=1),
+    )
+    client = _client(settings)
+
+    response = _post(client, labels_dir, headers={"X-ALV-Profile": "secret"})
+    assert response.status_code == 200
+    assert response.headers["X-ALV-Profile-Status"] == "profiled"
+    debug = response.json()["debug"]
+    assert [stage["name"] for stage in debug["stages"]] == ["upload", "decode", "queue", "upstream", "parse", "validate"]
+    assert debug["scope"] == "process"
+    assert debug["top_functions"]
+    assert debug["peak_memory_kb"] > 0
+
+    _post(client, labels_dir, headers={"X-ALV-Profile": "secret"})
+    assert len(list(tmp_path.glob("profile-*.json"))) == 1
+
+
+def test_profiling_disabled_by_default(tmp_path, labels_dir):
+    client = _client(Settings(gemini_api_key="test"))
+
+    response = _post(client, labels_dir, headers={"X-ALV-Profile": ""})
+    assert response.status_code == 200
+    assert response.json()["debug"] is None
+
+
+def test_sampled_requests_only_write_reports(tmp_path, labels_dir):
+    settings = Settings(
+        gemini_api_key="test",
+        profiling=ProfilingSettings(sample_rate=1.0, report_dir=str(tmp_path)),
+    )
+    client = _client(settings)
+
+    response = _post(client, labels_dir)
+    assert response.status_code == 200
+    assert response.json()["debug"] is None
+    assert len(list(tmp_path.glob("profile-*.json"))) == 1
+
+
+def test_sampling_requires_report_dir():
+    assert not should_profile(ProfilingSettings(sample_rate=1.0), None)
+    assert should_profile(ProfilingSettings(sample_rate=1.0, report_dir="reports"), None)
+
+
+def test_busy_profiler_is_reported(labels_dir):
+    client = _client(Settings(gemini_api_key="test", profiling=ProfilingSettings(header_token="secret")))
+
+    assert profiling._profile_lock.acquire(blocking=False)
+    try:
+        response = _post(client, labels_dir, headers={"X-ALV-Profile": "secret"})
+    finally:
+        profiling._profile_lock.release()
+    assert response.status_code == 200
+    assert response.headers["X-ALV-Profile-Status"] == "skipped-busy"
+    assert response.json()["debug"] is None
+
+
+def test_wrong_header_token_does_not_profile():
+    cfg = ProfilingSettings(header_token="secret")
+    assert not should_profile(cfg, "secreT")
+    assert not should_profile(cfg, None)
+    assert should_profile(cfg, "secret")
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from app.schemas import TokenUsage, VerificationPayload
+from app.services.prompts import VERIFICATION_PROMPT
+from app.services.usage import UsageTracker, usage_from_response
+
+
+def test_prompt_prefix_matches_gov_warning_requirement():
+    first = VERIFICATION_PROMPT.render(
+        VerificationPayload(brand_name="Old Crow", product_class="Bourbon", alcohol_content="40%")
+    )
+    second = VERIFICATION_PROMPT.render(
+        VerificationPayload(
+            brand_name="Bushmills",
+            product_class="Irish Whiskey",
+            alcohol_content="80 PROOF",
+            net_contents="750 mL",
+            require_gov_warning=False,
+        )
+    )
+    assert first.startswith(VERIFICATION_PROMPT.gov_warning_prefix)
+    assert second.startswith(VERIFICATION_PROMPT.prefix)
+    assert '"government_warning"' in first
+    assert '"government_warning"' not in second
+    assert 'Brand Name: "Old Crow"' in first
+    assert 'Net Contents: "Not Specified"' in first
+    assert "Require Government Warning: No" in second
+
+
+def test_usage_from_response_reads_metadata():
+    response = SimpleNamespace(
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=1200,
+            candidates_token_count=300,
+            cached_content_token_count=800,
+            total_token_count=1700,
+        )
+    )
+    assert usage_from_response(response) == TokenUsage(
+        input_tokens=1200, output_tokens=500, thinking_tokens=200, cached_tokens=800, total_tokens=1700
+    )
+    assert usage_from_response(SimpleNamespace()) == TokenUsage()
+
+
+def test_usage_tracker_aggregates():
+    tracker = UsageTracker()
+    tracker.record(TokenUsage(input_tokens=10, output_tokens=5, cached_tokens=4, total_tokens=15))
+    tracker.record(TokenUsage(input_tokens=20, output_tokens=7, total_tokens=27))
+    summary = tracker.snapshot()
+    assert summary.requests == 2
+    assert summary.input_tokens == 30
+    assert summary.output_tokens == 12
+    assert summary.cached_tokens == 4
+    assert summary.total_tokens == 42
+
+
+def test_usage_endpoint(client):
+    response = client.get("/api/usage")
+    assert response.status_code == 200
+    assert set(response.json()) >= {"requests", "input_tokens", "output_tokens", "cached_tokens"}
+
+
+def test_usage_tracker_dedupes_keys_with_bounded_memory():
+    tracker = UsageTracker(max_recorded_keys=2)
+    usage = TokenUsage(input_tokens=1, total_tokens=1)
+    tracker.record_many([usage, usage], key="batch:a")
+    tracker.record_many([usage, usage], key="batch:a")
+    assert tracker.snapshot().requests == 2
+    tracker.record_many([usage], key="batch:b")
+    tracker.record_many([usage], key="batch:c")
+    assert len(tracker._recorded_keys) == 2
+    assert tracker.snapshot().requests == 4